@@ -0,0 +1,298 @@
+"""
+Headless запуск симуляции без tkinter.
+
+    python -m cli run scenario.json --strategy min_idle --seed 1
+    python -m cli sweep scenario.json --strategies min_wait,min_idle --seeds 20 --workers 4 --db results.db
+    python -m cli bench
+    python -m cli serve --port 8765 --scenario scenario.json
+    python -m cli ui
+
+Тяжелые модули (tkinter, sqlite3-хранилище, multiprocessing, NumPy) импортируются
+только внутри команд, которым они нужны: воркеры и короткие прогоны стартуют быстро.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+from models import Building, Person
+from controller import Controller, STRATEGIES
+from simulation import Simulation
+from journeys import JourneyArchive
+
+
+class ManualClock:
+    """Виртуальные часы: время двигается только вызовом advance()."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, dt: float) -> float:
+        self.now += dt
+        return self.now
+
+
+def load_events(path: str) -> List[Dict]:
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: scenario must be a list of events")
+    return data
+
+
+def is_idle(sim: Simulation) -> bool:
+    """Сценарий отработан, все люди ушли, лифты стоят."""
+    b = sim.building
+    return (sim.scenario_finished() and not sim.fire_alarm and not b.people
+            and all(not e.load and e.velocity == 0 for e in b.elevators))
+
+
+def run_headless(events: List[Dict], num_floors: int = 10, num_elevators: int = 3, strategy: str = "min_wait",
+                 seed: Optional[int] = None, dt: float = 0.05, max_time: Optional[float] = None,
+                 archive: Optional[JourneyArchive] = None) -> Simulation:
+    """
+    Прогоняет сценарий в текущем потоке на виртуальных часах (без sleep).
+    Останавливается, когда симуляция опустела, или по достижении max_time секунд.
+    archive - архив поездок (например, с memory_cap/spill_dir для длинных прогонов).
+    """
+    if seed is not None:
+        random.seed(seed)
+    # id людей попадают в сохраненные поездки: нумеруем заново в каждом прогоне,
+    # чтобы результат зависел только от (strategy, config, seed)
+    Person._id_counter = 0
+    if max_time is None:
+        max_time = max((ev.get('time', 0) for ev in events), default=0) + 600.0
+
+    clock = ManualClock()
+    sim = Simulation(Building(num_floors, num_elevators), Controller(strategy), clock=clock, archive=archive)
+    sim.load_scenario(events)
+
+    while sim.sim_time_accumulator < max_time - 1e-9:
+        # Последний шаг укорачиваем, чтобы прогон заканчивался ровно на max_time при любом dt
+        step = min(dt, max_time - sim.sim_time_accumulator)
+        sim.step(step, clock.advance(step))
+        if is_idle(sim):
+            break
+    return sim
+
+
+def make_archive(args, run_name: str = "") -> Optional[JourneyArchive]:
+    """Архив с ограничением памяти, если заданы --spill-dir/--memory-cap (проверены в main)."""
+    if not args.spill_dir:
+        return None
+    import os
+
+    return JourneyArchive(memory_cap=args.memory_cap, spill_dir=os.path.join(args.spill_dir, run_name))
+
+
+def summarize(sim: Simulation) -> Dict:
+    stats = sim.get_stats()
+    out = {k: v for k, v in stats.items() if k != "elevators"}
+    out["elevators"] = [{"id": e.id, "trips": e.trips, "idle_trips": e.empty_trips,
+                         "people_transported": e.people_transported} for e in stats["elevators"]]
+    return out
+
+
+def save_to_store(path: str, sim: Simulation, strategy: str, num_floors: int, num_elevators: int,
+                  seed: Optional[int], journeys: bool) -> int:
+    from results_store import ResultsStore
+
+    with ResultsStore(path) as store:
+        return store.save_run(sim.get_stats(), strategy, {"num_floors": num_floors, "num_elevators": num_elevators},
+                              seed=seed, intervals=sim.metrics.export_intervals(),
+                              journeys=sim.archive if journeys else None)
+
+
+# --- Commands ---
+def cmd_run(args) -> int:
+    events = load_events(args.scenario)
+    sim = run_headless(events, args.floors, args.elevators, args.strategy, args.seed, args.dt, args.max_time,
+                       archive=make_archive(args))
+    summary = summarize(sim)
+    if args.db:
+        summary["run_id"] = save_to_store(args.db, sim, args.strategy, args.floors, args.elevators, args.seed,
+                                          args.journeys)
+    json.dump(summary, sys.stdout, indent=4)
+    print()
+    return 0
+
+
+def _sweep_job(job) -> Dict:
+    args, events, strategy, seed = job
+    started = time.perf_counter()
+    sim = run_headless(events, args.floors, args.elevators, strategy, seed, args.dt, args.max_time,
+                       archive=make_archive(args, f"{strategy}-{seed}"))
+    result = {"strategy": strategy, "seed": seed, "total_transported": sim.get_stats()["total_transported"],
+              "sim_time": sim.sim_time_accumulator, "wall_time": time.perf_counter() - started}
+    if args.db:
+        result["run_id"] = save_to_store(args.db, sim, strategy, args.floors, args.elevators, seed, args.journeys)
+    return result
+
+
+def cmd_sweep(args) -> int:
+    events = load_events(args.scenario)
+    strategies = [s for s in args.strategies.split(",") if s]
+    for s in strategies:
+        if s not in STRATEGIES:
+            raise SystemExit(f"Unknown strategy: {s}")
+    jobs = [(args, events, s, seed) for s in strategies for seed in range(args.seed_start, args.seed_start + args.seeds)]
+
+    if args.workers > 1:
+        import multiprocessing
+
+        with multiprocessing.Pool(args.workers) as pool:
+            results = pool.map(_sweep_job, jobs)
+    else:
+        results = [_sweep_job(job) for job in jobs]
+
+    for r in results:
+        print(json.dumps(r))
+    return 0
+
+
+def cmd_bench(args) -> int:
+    import os
+    import statistics
+    import subprocess
+
+    # 1. Startup: сколько стоит запустить CLI в новом процессе (как воркер)
+    here = os.path.dirname(os.path.abspath(__file__))
+    startup = []
+    for _ in range(args.startup_runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "cli", "--help"], cwd=here, check=True, stdout=subprocess.DEVNULL)
+        startup.append(time.perf_counter() - started)
+    baseline = []
+    for _ in range(args.startup_runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        baseline.append(time.perf_counter() - started)
+
+    # 2. Throughput: поток людей на случайные этажи
+    rng = random.Random(args.seed)
+    events = [{"time": t, "action": "spawn", "floor": rng.randint(1, args.floors), "count": 1}
+              for t in range(args.duration)]
+    started = time.perf_counter()
+    sim = run_headless(events, args.floors, args.elevators, args.strategy, args.seed, args.dt,
+                       max_time=args.duration + 600.0)
+    wall = time.perf_counter() - started
+    steps = sim.sim_time_accumulator / args.dt
+
+    print(f"startup (python -m cli --help): median {statistics.median(startup) * 1000:.1f} ms "
+          f"(bare interpreter {statistics.median(baseline) * 1000:.1f} ms)")
+    print(f"simulation: {sim.sim_time_accumulator:.0f} sim s in {wall:.2f} s wall "
+          f"({sim.sim_time_accumulator / wall:.0f}x real time, {steps / wall:.0f} steps/s), "
+          f"transported {sim.get_stats()['total_transported']}")
+    return 0
+
+
+def cmd_serve(args) -> int:
+    import asyncio
+    from state_server import StateServer
+
+    sim = Simulation(Building(args.floors, args.elevators), Controller(args.strategy))
+    if args.scenario:
+        sim.load_scenario(load_events(args.scenario))
+    sim.start_sim()
+    if args.paused:
+        sim.pause_sim()
+
+    server = StateServer(sim, host=args.host, port=args.port, unix_path=args.unix, interval=args.interval)
+
+    async def serve():
+        await server.start()
+        where = args.unix or f"{args.host}:{server.port}"
+        print(f"Serving state on {where}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_ui(args) -> int:
+    from main_app import MainApp  # tkinter нужен только здесь
+
+    MainApp().run()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Elevator simulation (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_sim_args(p):
+        p.add_argument("--floors", type=int, default=10)
+        p.add_argument("--elevators", type=int, default=3)
+        p.add_argument("--dt", type=float, default=0.05, help="Simulation step, seconds")
+        p.add_argument("--max-time", type=float, default=None, help="Stop after this many simulated seconds")
+
+    def add_archive_args(p):
+        p.add_argument("--spill-dir", help="Spill finished journeys to files in this directory")
+        p.add_argument("--memory-cap", type=int, default=None,
+                       help="Journeys kept in memory before spilling (requires --spill-dir)")
+
+    p = sub.add_parser("run", help="Run one scenario and print the report as JSON")
+    p.add_argument("scenario")
+    add_sim_args(p)
+    p.add_argument("--strategy", choices=STRATEGIES, default="min_wait")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--db", help="Save the run into this results store")
+    p.add_argument("--journeys", action="store_true", help="Also store journey rows")
+    add_archive_args(p)
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("sweep", help="Run a scenario over strategies x seeds")
+    p.add_argument("scenario")
+    add_sim_args(p)
+    p.add_argument("--strategies", default=",".join(STRATEGIES))
+    p.add_argument("--seeds", type=int, default=10, help="Number of seeds")
+    p.add_argument("--seed-start", type=int, default=0)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--db", help="Save every run into this results store")
+    p.add_argument("--journeys", action="store_true", help="Also store journey rows")
+    add_archive_args(p)
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("bench", help="Measure startup time and simulation throughput")
+    add_sim_args(p)
+    p.add_argument("--strategy", choices=STRATEGIES, default="min_wait")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--duration", type=int, default=3600, help="Seconds of arrivals (one person per second)")
+    p.add_argument("--startup-runs", type=int, default=5)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("serve", help="Run in real time and stream state to local subscribers")
+    p.add_argument("--floors", type=int, default=10)
+    p.add_argument("--elevators", type=int, default=3)
+    p.add_argument("--strategy", choices=STRATEGIES, default="min_wait")
+    p.add_argument("--scenario", help="Scenario to load before starting")
+    p.add_argument("--paused", action="store_true", help="Wait for a resume command")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--unix", help="Listen on this Unix socket instead of TCP")
+    p.add_argument("--interval", type=float, default=0.1, help="Seconds between state frames")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("ui", help="Open the Tk window")
+    p.set_defaults(func=cmd_ui)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # До запуска задач: в воркерах пула SystemExit не обрабатывается
+    if getattr(args, "memory_cap", None) is not None and not args.spill_dir:
+        parser.error("--memory-cap requires --spill-dir")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 from typing import List, Optional
 from models import Elevator, Person, Building
 
+STRATEGIES = ("min_wait", "min_idle")
+SCORE_EPS = 1e-9  # оценки, отличающиеся меньше, считаются равными
+
 
 class Controller:
     def __init__(self, strategy_name="min_wait"):
@@ -22,7 +25,7 @@ class Controller:
             # (Упрощение: считаем, что лифт заберет всех, если есть место)
             assigned = False
             for e in building.elevators:
-                if floor in e.targets and not e.passengers:  # e.passengers check prevents stopping if full logic implies bypass
+                if e.has_target(floor) and not e.load:  # e.load check prevents stopping if full logic implies bypass
                     # Но по ТЗ лифт должен останавливаться.
                     # Проверяем, едет ли он в ту же сторону, куда хочет человек?
                     # В данной реализации упростим: если этаж есть в целях, считаем его назначенным.
@@ -49,7 +52,7 @@ class Controller:
         min_score = float('inf')
 
         for e in elevators:
-            if len(e.passengers) >= e.capacity:
+            if e.load >= e.capacity:
                 score = float('inf')  # Полный
             else:
                 distance = abs(e.current_floor - origin)
@@ -61,7 +64,8 @@ class Controller:
 
                 score = distance / e.max_speed + len(e.targets) * 2  # +2 сек на каждую остановку
 
-            if score < min_score:
+            # Почти равные оценки - в пользу лифта с меньшим номером (не по погрешности округления)
+            if score < min_score - SCORE_EPS:
                 min_score = score
                 best_e = e
         return best_e
@@ -71,7 +75,7 @@ class Controller:
         # Сначала ищем лифты, которые уже едут в попутном направлении
         candidates = []
         for e in elevators:
-            if len(e.passengers) >= e.capacity: continue
+            if e.load >= e.capacity: continue
             is_on_way_up = e.direction == "up" and e.current_floor <= origin
             is_on_way_down = e.direction == "down" and e.current_floor >= origin
             if is_on_way_up or is_on_way_down or e.direction == "idle":
@@ -81,4 +85,4 @@ class Controller:
             candidates = elevators
 
         # Из кандидатов выбираем того, кто ближе
-        return min(candidates, key=lambda e: abs(e.current_floor - origin))
\ No newline at end of file
+        return min(candidates, key=lambda e: round(abs(e.current_floor - origin) / SCORE_EPS))
\ No newline at end of file
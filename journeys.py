@@ -0,0 +1,130 @@
+import os
+import math
+from array import array
+from contextlib import ExitStack
+from typing import Dict, Iterator, List, Optional
+from models import Person
+
+
+class JourneyArchive:
+    """
+    Колоночный архив завершенных поездок.
+    Буферы выделяются заранее и растут блоками по chunk_size строк.
+    Если задан spill_dir, то при достижении memory_cap строк буферы
+    дописываются в файлы (по одному на колонку) и переиспользуются.
+    Файлы колонок в spill_dir создаются заново (данные прошлого прогона стираются).
+    """
+
+    # name -> typecode (array module)
+    COLUMNS = {
+        "person_id": "q",
+        "origin": "i",
+        "target": "i",
+        "elevator_id": "i",
+        "created_at": "d",
+        "decision_time": "d",
+        "enter_time": "d",
+        "delivered_at": "d",
+        "evacuated": "b",
+    }
+
+    def __init__(self, chunk_size: int = 4096, memory_cap: Optional[int] = None, spill_dir: Optional[str] = None):
+        if memory_cap is not None and not spill_dir:
+            raise ValueError("memory_cap requires spill_dir")
+        self.chunk_size = chunk_size
+        self.memory_cap = memory_cap
+        self.spill_dir = spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            for name in self.COLUMNS:
+                open(self._column_path(name), "wb").close()
+
+        self._buffers: Dict[str, array] = {name: array(code) for name, code in self.COLUMNS.items()}
+        self._capacity = 0
+        self._size = 0  # строк в памяти
+        self.spilled = 0  # строк на диске
+        self._grow()
+
+    def __len__(self):
+        return self.spilled + self._size
+
+    def _grow(self):
+        for name, buf in self._buffers.items():
+            buf.extend(array(buf.typecode, bytes(buf.itemsize * self.chunk_size)))
+        self._capacity += self.chunk_size
+
+    def record(self, p: Person):
+        """Записывает поездку человека (доставлен или эвакуирован)."""
+        if self._size >= self._capacity:
+            self._grow()
+
+        i = self._size
+        b = self._buffers
+        b["person_id"][i] = p.id
+        b["origin"][i] = p.origin
+        b["target"][i] = p.target if p.target is not None else 0
+        b["elevator_id"][i] = p.elevator_id if p.elevator_id is not None else 0
+        b["created_at"][i] = p.created_at
+        b["decision_time"][i] = p.decision_time if p.decision_time is not None else math.nan
+        b["enter_time"][i] = p.enter_time if p.enter_time is not None else math.nan
+        b["delivered_at"][i] = p.delivered_at if p.delivered_at is not None else math.nan
+        b["evacuated"][i] = 1 if p.state == "evacuated" else 0
+        self._size += 1
+
+        if self.spill_dir and self.memory_cap and self._size >= self.memory_cap:
+            self.spill()
+
+    def spill(self):
+        """Сбрасывает строки из памяти на диск. Буферы остаются выделенными."""
+        if not self.spill_dir or not self._size:
+            return
+        for name, buf in self._buffers.items():
+            with open(self._column_path(name), "ab") as f:
+                buf[:self._size].tofile(f)
+        self.spilled += self._size
+        self._size = 0
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.spill_dir, f"{name}.bin")
+
+    def column(self, name: str) -> array:
+        """Возвращает всю колонку (диск + память) как array."""
+        buf = self._buffers[name]
+        out = array(buf.typecode)
+        if self.spilled:
+            with open(self._column_path(name), "rb") as f:
+                out.fromfile(f, self.spilled)
+        out.extend(buf[:self._size])
+        return out
+
+    def iter_batches(self, batch_size: int = 4096) -> Iterator[List[tuple]]:
+        """
+        Строки пачками по batch_size (диск, затем память).
+        Файлы колонок читаются кусками, в памяти одновременно не больше одной пачки.
+        """
+        names = list(self.COLUMNS)
+        if self.spilled:
+            with ExitStack() as stack:
+                files = [stack.enter_context(open(self._column_path(name), "rb")) for name in names]
+                left = self.spilled
+                while left:
+                    n = min(batch_size, left)
+                    cols = []
+                    for name, f in zip(names, files):
+                        col = array(self.COLUMNS[name])
+                        col.fromfile(f, n)
+                        cols.append(col)
+                    yield list(zip(*cols))
+                    left -= n
+        for start in range(0, self._size, batch_size):
+            end = min(start + batch_size, self._size)
+            yield list(zip(*(self._buffers[name][start:end] for name in names)))
+
+    def to_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        import numpy as np  # Опциональная зависимость, нужна только для анализа
+
+        return {name: np.frombuffer(self.column(name), dtype=np.dtype(code)) for name, code in self.COLUMNS.items()}
+
+    def rows(self) -> List[Dict]:
+        cols = {name: self.column(name) for name in self.COLUMNS}
+        return [{name: cols[name][i] for name in self.COLUMNS} for i in range(len(self))]
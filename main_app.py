@@ -5,6 +5,7 @@ import time
 from models import Building, Person
 from controller import Controller
 from simulation import Simulation
+from results_store import ResultsStore
 
 
 class MainApp:
@@ -16,6 +17,8 @@ class MainApp:
         # Defaults
         self.num_floors = 10
         self.num_elevators = 3
+        self.results_path = "results.db"
+        self.store_journeys = tk.BooleanVar(value=False)  # Сохранять ли строки поездок в results.db
 
         self.building = Building(self.num_floors, self.num_elevators)
         self.controller = Controller()
@@ -82,6 +85,7 @@ class MainApp:
 
         ttk.Button(scen_grp, text="Import Scenario", command=self.import_scenario).pack(fill=tk.X)
         ttk.Button(scen_grp, text="Export Config", command=self.export_config).pack(fill=tk.X)
+        ttk.Checkbutton(scen_grp, text="Store journeys", variable=self.store_journeys).pack(anchor=tk.W)
 
         man_frame = ttk.Frame(scen_grp)
         man_frame.pack(pady=5)
@@ -173,8 +177,9 @@ class MainApp:
         try:
             f = int(self.ent_spawn.get())
             if 1 <= f <= self.num_floors:
-                p = Person(f, time.time())
-                self.building.add_person(p)
+                with self.sim.lock:
+                    p = self.building.new_person(f, time.time())
+                    self.building.add_person(p)
             else:
                 raise ValueError
         except:
@@ -227,13 +232,24 @@ class MainApp:
             status = "MOVING" if e.velocity != 0 else ("OPEN" if e.doors_open else "IDLE")
             dr = "UP" if e.velocity > 0 else ("DOWN" if e.velocity < 0 else "-")
             txt += f"E{e.id}: F{e.current_floor:.1f} [{dr}] {status}\n"
-            txt += f"    Ppl: {len(e.passengers)}/{e.capacity} | Trgt: {e.targets}\n"
+            txt += f"    Ppl: {e.load}/{e.capacity} | Trgt: {e.targets}\n"
 
         txt += "\n--- Queues ---\n"
         for f, q in self.building.waiting_queues.items():
             if q:
                 txt += f"Floor {f}: {len(q)} waiting\n"
 
+        txt += "\n--- Last minute ---\n"
+        with self.sim.lock:
+            m = self.sim.metrics
+            if len(m.times["1s"]):
+                txt += f"Delivered/min: {m.mean('deliveries_per_min', 60):.1f}\n"
+                txt += f"Avg queue: {m.mean('queue.total', 60):.1f}\n"
+                txt += f"Utilization: {m.mean('utilization', 60) * 100:.0f}%\n"
+                for e in self.building.elevators:
+                    txt += f"E{e.id}: busy {m.mean(f'util.{e.id}', 60) * 100:.0f}%, " \
+                           f"load {m.mean(f'load.{e.id}', 60) * 100:.0f}%\n"
+
         self.txt_stats.insert(tk.END, txt)
         self.txt_stats.config(state=tk.DISABLED)
 
@@ -278,7 +294,7 @@ class MainApp:
 
             self.canvas.create_rectangle(x_center - 12, rect_y_top, x_center + 12, rect_y_bot, fill=color,
                                          outline="black")
-            self.canvas.create_text(x_center, (rect_y_top + rect_y_bot) / 2, text=str(len(e.passengers)), fill="white")
+            self.canvas.create_text(x_center, (rect_y_top + rect_y_bot) / 2, text=str(e.load), fill="white")
 
     def show_final_report(self):
         stats = self.sim.get_stats()
@@ -293,6 +309,17 @@ class MainApp:
             idle_pct = (e.empty_trips / e.trips * 100) if e.trips > 0 else 0
             report += f"E{e.id}: Trips={e.trips}, Idle={idle_pct:.1f}%, Ppl={e.people_transported}\n"
 
+        # Every run goes to the local results store
+        try:
+            with ResultsStore(self.results_path) as store:
+                run_id = store.save_run(stats, self.controller.strategy_name,
+                                        {"num_floors": self.num_floors, "num_elevators": self.num_elevators},
+                                        intervals=self.sim.metrics.export_intervals(),
+                                        journeys=self.sim.archive if self.store_journeys.get() else None)
+            report += f"\nSaved as run #{run_id} in {self.results_path}\n"
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
         # Save to file option
         res = messagebox.askyesno("Report", report + "\n\nSave to JSON?")
         if res:
@@ -1,7 +1,10 @@
 import time
 import random
 import math
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Set, Tuple
+
+ARRIVAL_EPS = 1e-6  # м и м/с: считаем, что приехали
+MAX_SUBSTEPS = 16  # фаз движения за один шаг обычно не больше 4
 
 
 class Person:
@@ -13,6 +16,10 @@ class Person:
     _id_counter = 0
 
     def __init__(self, origin: int, created_at: float):
+        self.reset(origin, created_at)
+
+    def reset(self, origin: int, created_at: float):
+        """Переинициализация объекта (используется при повторном использовании из free list)."""
         Person._id_counter += 1
         self.id = Person._id_counter
         self.origin = origin
@@ -23,16 +30,17 @@ class Person:
         self.decision_time: Optional[float] = None  # Когда выбрал этаж
         self.enter_time: Optional[float] = None  # Когда вошел в лифт
         self.delivered_at: Optional[float] = None  # Когда вышел из лифта
+        self.elevator_id: Optional[int] = None  # В каком лифте ехал
 
         self.state: str = "choosing"  # choosing, waiting, in_elevator, delivered, evacuated
 
-    def choose_target(self, num_floors: int):
+    def choose_target(self, num_floors: int, now: Optional[float] = None):
         """Выбор этажа. Не может быть равен текущему."""
         choices = [f for f in range(1, num_floors + 1) if f != self.origin]
         if not choices:
             choices = [1]  # Fallback
         self.target = random.choice(choices)
-        self.decision_time = time.time()
+        self.decision_time = now if now is not None else time.time()
         self.state = "waiting"
 
     def get_wait_time(self) -> float:
@@ -56,8 +64,11 @@ class Elevator:
         self.velocity: float = 0.0
         self.doors_open: bool = False
 
-        self.targets: List[int] = []
-        self.passengers: List[Person] = []
+        self.targets: List[int] = []  # упорядочены по _sort_targets
+        self._target_set: Set[int] = set()
+        # Пассажиры, сгруппированные по этажу назначения
+        self._by_target: Dict[Optional[int], List[Person]] = {}
+        self.load = 0  # число пассажиров
 
         # Stats
         self.trips = 0
@@ -67,13 +78,59 @@ class Elevator:
         # Logic flags
         self.direction: str = "idle"  # "up", "down", "idle"
 
+        # Physics step stats
+        self.physics_steps = 0
+        self.physics_substeps = 0
+        self.max_step_dt = 0.0
+
+    @property
+    def passengers(self) -> Tuple[Person, ...]:
+        """
+        Все пассажиры (кортеж - только для чтения, passengers.append/remove падают).
+        Посадка и высадка - через board/unload/unload_all, число пассажиров - load.
+        """
+        return tuple(p for group in self._by_target.values() for p in group)
+
+    def board(self, people: List[Person]):
+        """Посадка группы: индексируем по этажу назначения и один раз сливаем цели."""
+        for p in people:
+            self._by_target.setdefault(p.target, []).append(p)
+        self.load += len(people)
+        self.add_targets(p.target for p in people if p.target)
+
+    def unload(self, floor: int) -> List[Person]:
+        """Высадка всех, кто едет на floor. O(1) на поиск."""
+        group = self._by_target.pop(floor, [])
+        self.load -= len(group)
+        return group
+
+    def unload_all(self) -> List[Person]:
+        group = [p for g in self._by_target.values() for p in g]
+        self._by_target.clear()
+        self.load = 0
+        return group
+
+    def has_target(self, floor: int) -> bool:
+        return floor in self._target_set
+
     def add_target(self, floor: int):
-        if floor not in self.targets:
-            self.targets.append(floor)
+        self.add_targets((floor,))
+
+    def add_targets(self, floors: Iterable[int]):
+        new = [f for f in set(floors) if f not in self._target_set]
+        if new:
+            self._target_set.update(new)
+            self.targets.extend(new)
             self._sort_targets()
 
+    def remove_target(self, floor: int):
+        if floor in self._target_set:
+            self._target_set.discard(floor)
+            self.targets.remove(floor)
+
     def clear_targets(self):
         self.targets.clear()
+        self._target_set.clear()
 
     def _sort_targets(self):
         # Сортировка целей в зависимости от текущего направления
@@ -88,6 +145,10 @@ class Elevator:
     def update_physics(self, dt: float, floor_height: float = 3.0):
         """
         Обновляет позицию и скорость. Возвращает True, если лифт движется.
+
+        Шаг dt делится на подшаги только на границах фаз движения (разгон, крейсер,
+        начало торможения, прибытие), внутри фазы ускорение постоянно и движение
+        считается точно. Поэтому большой dt не приводит к проскоку этажа.
         """
         if self.doors_open:
             self.velocity = 0.0
@@ -99,55 +160,91 @@ class Elevator:
             return False
 
         target_floor = self.targets[0]
-        target_y = (target_floor - 1) * floor_height
-        current_y = (self.current_floor - 1) * floor_height
+        self.physics_steps += 1
+        self.max_step_dt = max(self.max_step_dt, dt)
 
-        dist = target_y - current_y
+        y, v, _, arrived, substeps, direction_sign = self._integrate(
+            (self.current_floor - 1) * floor_height, self.velocity, (target_floor - 1) * floor_height, dt)
+        self.physics_substeps += substeps
+        if direction_sign:
+            self.direction = "up" if direction_sign > 0 else "down"
 
-        # Определяем желаемое направление
-        if abs(dist) < 0.05:
-            # Приехали
+        if arrived:
             self.current_floor = float(target_floor)
             self.velocity = 0.0
             return False  # Stopped to open doors
 
-        # Расчет физики: ускорение/торможение
-        direction_sign = 1.0 if dist > 0 else -1.0
-        self.direction = "up" if direction_sign > 0 else "down"
+        self.velocity = v
+        # Обратная конвертация в этажи
+        self.current_floor = (y / floor_height) + 1
+        return True
 
-        # Дистанция торможения: v^2 / (2*a)
-        stop_dist = (self.velocity ** 2) / (2 * self.max_accel)
+    def time_to_arrival(self, floor_height: float = 3.0) -> float:
+        """Через сколько секунд лифт остановится у targets[0] (inf, если цели нет)."""
+        if self.doors_open or not self.targets:
+            return math.inf
+        _, _, elapsed, arrived, _, _ = self._integrate(
+            (self.current_floor - 1) * floor_height, self.velocity, (self.targets[0] - 1) * floor_height, math.inf)
+        return elapsed if arrived else math.inf
 
-        if abs(dist) <= stop_dist + 0.1:
-            # Пора тормозить
-            accel = -self.max_accel * (1.0 if self.velocity > 0 else -1.0)
-        else:
-            # Можно разгоняться
-            if abs(self.velocity) < self.max_speed:
-                accel = self.max_accel * direction_sign
+    def _integrate(self, y: float, v: float, target_y: float, dt: float):
+        """
+        Движение к target_y в течение dt (по фазам, без изменения состояния лифта).
+        Возвращает (y, v, затраченное время, приехал ли, число подшагов, знак направления).
+        """
+        a = self.max_accel
+        elapsed = 0.0
+        substeps = 0
+        direction_sign = 0.0
+
+        while True:
+            dist = target_y - y
+            if abs(dist) <= ARRIVAL_EPS and abs(v) <= ARRIVAL_EPS:
+                return target_y, 0.0, elapsed, True, substeps, direction_sign
+            remaining = dt - elapsed
+            if remaining <= 0 or substeps >= MAX_SUBSTEPS:
+                return y, v, elapsed, False, substeps, direction_sign
+            substeps += 1
+
+            # Все считаем вдоль направления к цели: d >= 0, u - скорость к цели
+            direction_sign = 1.0 if dist > 0 else -1.0
+            d = abs(dist)
+            u = min(v * direction_sign, self.max_speed)
+
+            if u < 0:
+                # Едем от цели: гасим скорость
+                accel, h = a, -u / a
+            elif u * u > 2 * a * d * (1 + 1e-9) + 1e-12:
+                # Не успеваем остановиться: тормозим изо всех сил, проскочим и вернемся
+                accel, h = -a, u / a
+            elif d - u * u / (2 * a) <= 1e-9:
+                # Точка торможения: тормозим ровно в цель
+                t_stop = 2 * d / u
+                if t_stop <= remaining + ARRIVAL_EPS:  # допуск: прибытие на границе шага
+                    return target_y, 0.0, elapsed + t_stop, True, substeps, direction_sign
+                accel, h = -u * u / (2 * d), remaining
+            elif u < self.max_speed:
+                # Разгон до max_speed или до точки торможения
+                w = math.sqrt(a * d + u * u / 2)
+                accel, h = a, min((w - u) / a, (self.max_speed - u) / a)
             else:
-                accel = 0.0  # Крейсерская скорость
+                # Крейсер до точки торможения
+                accel, h = 0.0, (d - u * u / (2 * a)) / u
 
-        # v = v0 + at
-        self.velocity += accel * dt
+            h = min(h, remaining)
+            y += direction_sign * (u * h + 0.5 * accel * h * h)
+            v = direction_sign * (u + accel * h)
+            elapsed += h
 
-        # Лимит скорости (на всякий случай)
-        if self.velocity > self.max_speed: self.velocity = self.max_speed
-        if self.velocity < -self.max_speed: self.velocity = -self.max_speed
-
-        # x = x0 + vt
-        current_y += self.velocity * dt
-
-        # Обратная конвертация в этажи
-        self.current_floor = (current_y / floor_height) + 1
-        return True
+    def step_stats(self) -> Dict[str, float]:
+        return {"steps": self.physics_steps, "substeps": self.physics_substeps, "max_dt": self.max_step_dt}
 
     def open_doors(self):
         if not self.doors_open:
             self.doors_open = True
             # Фиксируем статистику поездки
             self.trips += 1
-            if not self.passengers:
+            if not self.load:
                 self.empty_trips += 1
 
     def close_doors(self):
@@ -160,6 +257,18 @@ class Building:
         self.elevators = [Elevator(i + 1) for i in range(num_elevators)]
         self.people: List[Person] = []
         self.waiting_queues: Dict[int, List[Person]] = {f: [] for f in range(1, num_floors + 1)}
+        self._free_people: List[Person] = []  # Ушедшие люди, готовые к повторному использованию
+
+    def new_person(self, origin: int, created_at: float) -> Person:
+        """Создает человека, по возможности переиспользуя объект из free list."""
+        if self._free_people:
+            p = self._free_people.pop()
+            p.reset(origin, created_at)
+            return p
+        return Person(origin, created_at)
+
+    def release_person(self, p: Person):
+        self._free_people.append(p)
 
     def add_person(self, p: Person):
         self.people.append(p)
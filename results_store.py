@@ -0,0 +1,203 @@
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from journeys import JourneyArchive
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    strategy TEXT NOT NULL,
+    config TEXT NOT NULL,
+    seed INTEGER,
+    num_floors INTEGER,
+    num_elevators INTEGER,
+    sim_time REAL,
+    total_transported INTEGER,
+    fire_alarms INTEGER,
+    fire_duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_strategy ON runs(strategy);
+CREATE INDEX IF NOT EXISTS idx_runs_config ON runs(config);
+CREATE INDEX IF NOT EXISTS idx_runs_seed ON runs(seed);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs(strategy, config, seed);
+
+CREATE TABLE IF NOT EXISTS elevator_stats (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    elevator_id INTEGER NOT NULL,
+    trips INTEGER,
+    empty_trips INTEGER,
+    people_transported INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_elevator_stats_run ON elevator_stats(run_id);
+
+CREATE TABLE IF NOT EXISTS interval_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    t REAL NOT NULL,
+    name TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS idx_interval_metrics_run ON interval_metrics(run_id, name);
+
+CREATE TABLE IF NOT EXISTS journeys (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    person_id INTEGER,
+    origin INTEGER,
+    target INTEGER,
+    elevator_id INTEGER,
+    created_at REAL,
+    decision_time REAL,
+    enter_time REAL,
+    delivered_at REAL,
+    evacuated INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_journeys_run ON journeys(run_id);
+"""
+
+RUN_COLUMNS = ("id", "created_at", "strategy", "config", "seed", "num_floors", "num_elevators",
+               "sim_time", "total_transported", "fire_alarms", "fire_duration")
+TEXT_COLUMNS = ("strategy", "config")
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Каноничная строка конфигурации (одинаковые конфиги -> одинаковый ключ)."""
+    return json.dumps(config, sort_keys=True, separators=(",", ":"))
+
+
+class ResultsStore:
+    """
+    Локальное хранилище результатов прогонов (SQLite, режим WAL).
+    Каждый процесс-воркер открывает свое подключение; запись одного прогона
+    выполняется одной транзакцией с пакетными вставками.
+    """
+
+    def __init__(self, path: str = "results.db", batch_size: int = 5000):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save_run(self, stats: Dict[str, Any], strategy: str, config: Dict[str, Any], seed: Optional[int] = None,
+                 intervals: Optional[Iterable[Tuple[float, str, float]]] = None,
+                 journeys: Optional[JourneyArchive] = None) -> int:
+        """
+        Сохраняет результат Simulation.get_stats() и возвращает id прогона.
+        intervals - (t, name, value); journeys - архив поездок (опционально).
+        """
+        elevators = stats.get("elevators", [])
+        with self.conn:  # одна транзакция на прогон
+            cur = self.conn.execute(
+                "INSERT INTO runs (created_at, strategy, config, seed, num_floors, num_elevators, sim_time, "
+                "total_transported, fire_alarms, fire_duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), strategy, config_key(config), seed, config.get("num_floors"),
+                 config.get("num_elevators", len(elevators)), stats.get("sim_time"),
+                 stats.get("total_transported"), stats.get("fire_alarms"), stats.get("fire_duration")))
+            run_id = cur.lastrowid
+
+            self.conn.executemany(
+                "INSERT INTO elevator_stats (run_id, elevator_id, trips, empty_trips, people_transported) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(run_id, e.id, e.trips, e.empty_trips, e.people_transported) for e in elevators])
+
+            if intervals is not None:
+                self._insert_batched(
+                    "INSERT INTO interval_metrics (run_id, t, name, value) VALUES (?, ?, ?, ?)",
+                    ((run_id, t, name, value) for t, name, value in intervals))
+
+            if journeys is not None and len(journeys):
+                # Читаем архив пачками, чтобы не поднимать сброшенные на диск строки в память целиком
+                names = list(JourneyArchive.COLUMNS)
+                sql = f"INSERT INTO journeys (run_id, {', '.join(names)}) VALUES (?{', ?' * len(names)})"
+                for batch in journeys.iter_batches(self.batch_size):
+                    self.conn.executemany(sql, [(run_id,) + row for row in batch])
+        return run_id
+
+    def _insert_batched(self, sql: str, rows: Iterable[tuple]):
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.conn.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            self.conn.executemany(sql, batch)
+
+    # --- Queries ---
+    def find_runs(self, strategy: Optional[str] = None, config: Optional[Dict[str, Any]] = None,
+                  seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        where, params = self._where(strategy, config, seed)
+        cur = self.conn.execute(f"SELECT {', '.join(RUN_COLUMNS)} FROM runs{where} ORDER BY id", params)
+        return [dict(zip(RUN_COLUMNS, row)) for row in cur]
+
+    def query(self, fields: Iterable[str] = ("sim_time", "total_transported"), strategy: Optional[str] = None,
+              config: Optional[Dict[str, Any]] = None, seed: Optional[int] = None) -> Dict[str, "numpy.ndarray"]:
+        """
+        Возвращает выбранные поля прогонов как массивы NumPy (ключ 'id' всегда есть).
+        Числовые поля - float (NULL -> nan), текстовые (strategy, config) - массивы object.
+        """
+        import numpy as np
+
+        fields = ["id"] + [f for f in fields if f != "id"]
+        for f in fields:
+            if f not in RUN_COLUMNS:
+                raise ValueError(f"Unknown field: {f}")
+        where, params = self._where(strategy, config, seed)
+        rows = self.conn.execute(f"SELECT {', '.join(fields)} FROM runs{where} ORDER BY id", params).fetchall()
+        out = {}
+        for i, f in enumerate(fields):
+            if f == "id":
+                dtype = np.int64
+            elif f in TEXT_COLUMNS:
+                dtype = object
+            else:
+                dtype = float
+            out[f] = np.array([r[i] for r in rows], dtype=dtype)
+        return out
+
+    def elevator_stats(self, run_id: int) -> Dict[str, "numpy.ndarray"]:
+        return self._table_arrays("SELECT elevator_id, trips, empty_trips, people_transported FROM elevator_stats "
+                                  "WHERE run_id = ? ORDER BY elevator_id", (run_id,))
+
+    def interval_metrics(self, run_id: int, name: str) -> Dict[str, "numpy.ndarray"]:
+        return self._table_arrays("SELECT t, value FROM interval_metrics WHERE run_id = ? AND name = ? ORDER BY t",
+                                  (run_id, name))
+
+    def journeys(self, run_id: int) -> Dict[str, "numpy.ndarray"]:
+        names = list(JourneyArchive.COLUMNS)
+        return self._table_arrays(f"SELECT {', '.join(names)} FROM journeys WHERE run_id = ? ORDER BY rowid",
+                                  (run_id,))
+
+    def _table_arrays(self, sql: str, params: tuple) -> Dict[str, "numpy.ndarray"]:
+        import numpy as np
+
+        cur = self.conn.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+        # NULL (в т.ч. NaN, которые SQLite хранит как NULL) -> nan
+        return {n: np.array([np.nan if r[i] is None else r[i] for r in rows]) for i, n in enumerate(names)}
+
+    @staticmethod
+    def _where(strategy, config, seed) -> Tuple[str, list]:
+        clauses, params = [], []
+        if strategy is not None:
+            clauses.append("strategy = ?")
+            params.append(strategy)
+        if config is not None:
+            clauses.append("config = ?")
+            params.append(config_key(config))
+        if seed is not None:
+            clauses.append("seed = ?")
+            params.append(seed)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
@@ -1,29 +1,54 @@
+import heapq
+import math
 import threading
 import time
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from models import Building, Person
 from controller import Controller
+from journeys import JourneyArchive
+from timeseries import TimeSeriesRecorder
+
+MAX_STOPS_PER_STEP = 8  # остановок в один момент времени (защита от зацикливания)
+EPS = 1e-9  # с: события ближе EPS считаются одновременными
+TIMER_RESOLUTION = 1e-3  # с: точность таймеров людей
 
 
 class Simulation(threading.Thread):
-    def __init__(self, building: Building, controller: Controller, ui_callback=None):
+    def __init__(self, building: Building, controller: Controller, ui_callback=None,
+                 archive: Optional[JourneyArchive] = None, clock: Callable[[], float] = time.time):
         super().__init__(daemon=True)
         self.building = building
         self.controller = controller
         self.ui_callback = ui_callback
+        # Завершенные поездки (доставлен / эвакуирован)
+        self.archive = archive if archive is not None else JourneyArchive()
+        # Метрики во времени (очереди, загрузка, доставки в минуту)
+        self.metrics = TimeSeriesRecorder(building)
 
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
         self._pause_event.set()  # Running by default
         self.lock = threading.RLock()
 
+        # Источник времени. В UI - настенные часы, в headless-режиме - виртуальные (см. cli.py)
+        self.clock = clock
+
         self.speed_multiplier = 1.0
         self.sim_start_time: Optional[float] = None
         self.last_tick_time: Optional[float] = None
+        self.sim_time_accumulator = 0.0
+        self.steps = 0
+        self.substeps = 0
+        self._dispatch_pending = True
+        # Таймеры людей: куча (округленный момент запуска на часах self.clock, номер, человек, момент запуска)
+        self._timers: List[Tuple[float, int, Person, float]] = []
+        self._timer_seq = 0
+        self._people_seen = 0  # сколько людей из building.people уже получили таймер
 
         # Scenario
         self.scenario: List[Dict] = []
+        self._scenario_idx = 0
 
         # Fire Alarm
         self.fire_alarm = False
@@ -34,67 +59,24 @@ class Simulation(threading.Thread):
     def load_scenario(self, events: List[Dict]):
         # Sort by time
         self.scenario = sorted(events, key=lambda x: x.get('time', 0))
+        self._scenario_idx = 0
+
+    def scenario_finished(self) -> bool:
+        return self._scenario_idx >= len(self.scenario)
 
     def run(self):
-        self.sim_start_time = time.time()
-        self.last_tick_time = time.time()
-        scenario_idx = 0
+        self.sim_start_time = self.clock()
+        self.last_tick_time = self.clock()
 
         while not self._stop_event.is_set():
             self._pause_event.wait()  # Блокирует поток, если пауза
 
-            now = time.time()
+            now = self.clock()
             real_dt = now - self.last_tick_time
             self.last_tick_time = now
 
-            dt = real_dt * self.speed_multiplier
-            elapsed_sim_time = (now - self.sim_start_time)  # Это реальное время, для сценария надо скейлить?
-            # Упрощение: сценарий выполняется по реальному времени * speed, но сложнее синхронизировать.
-            # Будем считать scenario 'time' как "секунд симуляции". Нам нужен счетчик sim_time.
-
-            if not hasattr(self, 'sim_time_accumulator'):
-                self.sim_time_accumulator = 0.0
-            self.sim_time_accumulator += dt
-
-            with self.lock:
-                # 1. Scenario Events
-                while scenario_idx < len(self.scenario):
-                    ev = self.scenario[scenario_idx]
-                    if ev['time'] <= self.sim_time_accumulator:
-                        self._process_event(ev)
-                        scenario_idx += 1
-                    else:
-                        break
-
-                # 2. Person Logic
-                for p in list(self.building.people):
-                    # Choosing state (3s)
-                    if p.state == "choosing":
-                        if (now - p.created_at) * self.speed_multiplier >= 3.0:
-                            # Исправлено: условие "в течение 3 секунд".
-                            # Здесь мы просто ждем 3 "симуляционных" секунды (примерно)
-                            # Или можно упростить: (now - created) > 3/speed
-                            p.choose_target(self.building.num_floors)
-                            self.building.waiting_queues[p.origin].append(p)
-
-                    # Delivered cleanup (3s existence)
-                    elif p.state == "delivered" and p.delivered_at:
-                        if (now - p.delivered_at) * self.speed_multiplier >= 3.0:
-                            self.building.people.remove(p)
-
-                    # Fire evacuation (3s to disappear)
-                    elif p.state == "evacuated":
-                        # Можно добавить таймер, пока удаляем сразу или через 3 сек
-                        if (
-                                now - p.delivered_at) * self.speed_multiplier >= 3.0:  # delivered_at используется как время эвакуации
-                            self.building.people.remove(p)
-
-                # 3. Elevator Logic
-                if self.fire_alarm:
-                    self._handle_fire_logic(dt, now)
-                else:
-                    self.controller.assign(self.building)
-                    self._handle_normal_elevator_logic(dt, now)
+            # Будем считать scenario 'time' как "секунд симуляции".
+            self.step(real_dt * self.speed_multiplier, now)
 
             if self.ui_callback:
                 self.ui_callback()
@@ -102,25 +84,129 @@ class Simulation(threading.Thread):
             # Sleep to save CPU, adjusted by speed
             time.sleep(max(0.01, 0.05 / max(0.1, self.speed_multiplier)))
 
-    def _process_event(self, ev):
+    def step(self, dt: float, now: float):
+        """
+        Один шаг симуляции длиной dt секунд симуляции.
+        now - текущее значение self.clock() (для таймеров людей).
+
+        Шаг делится на подшаги в моменты событий сценария, срабатывания таймеров людей,
+        прибытия лифтов и на границах секунд (отсчеты метрик). Действия (появление людей,
+        выбор этажа, остановки, распределение вызовов) и отсчеты выполняются точно в свое
+        время, поэтому доставки и метрики не зависят от dt.
+        """
+        with self.lock:
+            self.steps += 1
+            remaining = dt
+            t = now - remaining / self.speed_multiplier  # момент на часах self.clock
+            self._instant_actions(t)
+            while remaining > 0:
+                h = min(remaining, self._time_to_next_action(t))
+                if remaining - h <= EPS:
+                    h = remaining
+                self.substeps += 1
+                self.sim_time_accumulator += h
+                remaining -= h
+                for e in self.building.elevators:
+                    e.update_physics(h)
+                t = now - remaining / self.speed_multiplier
+                self._instant_actions(t)
+                self.metrics.sample(self.sim_time_accumulator)
+
+    def _instant_actions(self, now: float):
+        """Все, что происходит мгновенно в момент now (на часах self.clock)."""
+        # 1. Scenario Events
+        while self._scenario_idx < len(self.scenario):
+            ev = self.scenario[self._scenario_idx]
+            if ev.get('time', 0) > self.sim_time_accumulator + EPS:
+                break
+            self._process_event(ev, now)
+            self._scenario_idx += 1
+
+        # 2. Person Logic
+        self._update_people(now)
+
+        # 3. Elevator Logic
+        if self.fire_alarm:
+            self._handle_fire_logic(now)
+            return
+        for _ in range(MAX_STOPS_PER_STEP):
+            # Вызовы распределяются только при изменениях: новый человек в очереди, остановка, конец пожара
+            if self._dispatch_pending:
+                self._dispatch_pending = False
+                self.controller.assign(self.building)
+            if not self._handle_normal_elevator_logic(now):
+                break
+
+    def _update_people(self, now: float):
+        """Срабатывание таймеров людей (3 с на выбор этажа и 3 с до ухода после выхода/эвакуации)."""
+        people = self.building.people
+        # Люди, добавленные с прошлого раза (сценарий, UI, сервер состояния)
+        for p in people[self._people_seen:]:
+            self._start_timer(p, p.created_at)
+
+        released = []
+        while self._timers and self._timer_left(self._timers[0][0], now) <= EPS:
+            _, _, p, since = heapq.heappop(self._timers)
+            # Choosing state (3s)
+            if p.state == "choosing" and p.created_at == since:
+                p.choose_target(self.building.num_floors, now)
+                self.building.waiting_queues[p.origin].append(p)
+                self._dispatch_pending = True
+            # Delivered cleanup / fire evacuation (delivered_at - время выхода или эвакуации)
+            elif p.state in ("delivered", "evacuated") and p.delivered_at == since:
+                released.append(p)
+
+        if released:
+            gone = {id(p) for p in released}
+            people = self.building.people = [p for p in people if id(p) not in gone]
+            for p in released:
+                self.building.release_person(p)
+        self._people_seen = len(people)
+
+    def _timer_left(self, since: float, now: float) -> float:
+        """Сколько секунд симуляции осталось до конца 3-секундного таймера, запущенного в since."""
+        return 3.0 - (now - since) * self.speed_multiplier
+
+    def _start_timer(self, p: Person, since: float):
+        # Все таймеры одной длины, поэтому куча по моменту запуска упорядочена и по сроку.
+        # Момент запуска округляется до TIMER_RESOLUTION: люди, добавленные почти одновременно
+        # (UI, сервер), срабатывают одним подшагом, а накопленная погрешность часов не влияет на порядок
+        start = round(since / TIMER_RESOLUTION) * TIMER_RESOLUTION
+        self._timer_seq += 1
+        heapq.heappush(self._timers, (start, self._timer_seq, p, since))
+
+    def _time_to_next_action(self, now: float) -> float:
+        """Секунд симуляции до ближайшего события сценария, таймера человека, прибытия лифта или отсчета метрик."""
+        h = self._timer_left(self._timers[0][0], now) if self._timers else math.inf
+        if self._scenario_idx < len(self.scenario):
+            h = min(h, self.scenario[self._scenario_idx].get('time', 0) - self.sim_time_accumulator)
+        # Отсчет метрик - ровно на границе секунды, иначе он зависел бы от dt
+        h = min(h, self.metrics.next_sample_time() - self.sim_time_accumulator)
+        for e in self.building.elevators:
+            t = e.time_to_arrival()
+            if t > EPS:
+                h = min(h, t)
+        return max(h, EPS)
+
+    def _process_event(self, ev, now: float):
         action = ev.get('action')
         if action == 'spawn':
             count = ev.get('count', 1)
             floor = ev.get('floor', 1)
             target = ev.get('target', None)  # Optional logic override
             for _ in range(count):
-                p = Person(floor, time.time())
+                p = self.building.new_person(floor, now)
                 if target:  # Если в сценарии задан целевой этаж заранее
                     # Хак: переопределяем логику выбора
                     # p.state = "choosing" но мы запомним target
                     pass
                 self.building.add_person(p)
         elif action == 'fire_start':
-            self.trigger_fire()
+            self.trigger_fire(now)
         elif action == 'fire_end':
-            self.stop_fire()
+            self.stop_fire(now)
 
-    def _handle_fire_logic(self, dt, now):
+    def _handle_fire_logic(self, now):
         # Лифты едут на 1 этаж без остановок
         for e in self.building.elevators:
             e.clear_targets()
@@ -129,19 +215,16 @@ class Simulation(threading.Thread):
             if e.current_floor != 1 and e.doors_open:
                 e.close_doors()
 
-            moving = e.update_physics(dt)
-
-            if not moving and e.current_floor == 1:
+            if e.velocity == 0 and e.current_floor == 1:
                 e.open_doors()
                 # Evacuate everyone inside
-                for p in list(e.passengers):
+                # ТЗ: "Все люди должны исчезнуть через 3 секунды".
+                # Оставим в self.building.people но пометим evacuated
+                for p in e.unload_all():
                     p.state = "evacuated"
                     p.delivered_at = now  # timestamp for removal
-                    e.passengers.remove(p)
-                    self.building.people.remove(p)  # Или переместить в delivered список?
-                    # ТЗ: "Все люди должны исчезнуть через 3 секунды".
-                    # Оставим в self.building.people но пометим evacuated
-                    self.building.people.append(p)
+                    self.archive.record(p)
+                    self._start_timer(p, now)
 
                     # Люди на этажах тоже эвакуируются
         for floor in self.building.waiting_queues:
@@ -150,50 +233,55 @@ class Simulation(threading.Thread):
                 p = queue.pop()
                 p.state = "evacuated"
                 p.delivered_at = now
+                self.archive.record(p)
+                self._start_timer(p, now)
 
-    def _handle_normal_elevator_logic(self, dt, now):
+    def _handle_normal_elevator_logic(self, now) -> bool:
+        """Остановки лифтов, стоящих у цели (или с открытыми дверями). True, если была остановка."""
+        stopped = False
         for e in self.building.elevators:
-            # Physics
-            moving = e.update_physics(dt)
-
             # Logic when stopped at target
-            if not moving and (e.doors_open or (e.targets and e.targets[0] == int(e.current_floor))):
-                floor = int(e.current_floor)
-                if not e.doors_open:
-                    e.open_doors()
-                    self.door_timer = now  # Start door open timer logic could be added
-
-                # Unload
-                for p in list(e.passengers):
-                    if p.target == floor:
-                        e.passengers.remove(p)
-                        e.people_transported += 1
-                        p.state = "delivered"
-                        p.delivered_at = now
-
-                # Remove floor from targets
-                if floor in e.targets:
-                    e.targets.remove(floor)
-
-                # Load (Кнопка "Ход" нажимается автоматически после посадки)
-                queue = self.building.waiting_queues[floor]
-                # Take people who want to go in the current direction (or any if idle)
-                # Simple logic: take everyone fitting capacity
-                while queue and len(e.passengers) < e.capacity:
-                    p = queue[0]  # Peek
-                    # Check direction match if not idle
-                    # (Упрощение: берем всех, сортировка целей лифта разрулит)
-                    p = queue.pop(0)
+            if not (e.doors_open or (e.velocity == 0 and e.targets and e.current_floor == e.targets[0])):
+                continue
+            stopped = True
+            self._dispatch_pending = True
+            floor = int(e.current_floor)
+            if not e.doors_open:
+                e.open_doors()
+                self.door_timer = now  # Start door open timer logic could be added
+
+            # Unload (все, кто едет на этот этаж, одной группой)
+            unloaded = e.unload(floor)
+            for p in unloaded:
+                p.state = "delivered"
+                p.delivered_at = now
+                self.archive.record(p)
+                self._start_timer(p, now)
+            e.people_transported += len(unloaded)
+
+            # Remove floor from targets
+            e.remove_target(floor)
+
+            # Load (Кнопка "Ход" нажимается автоматически после посадки)
+            queue = self.building.waiting_queues[floor]
+            # Take people who want to go in the current direction (or any if idle)
+            # Simple logic: take everyone fitting capacity
+            # (Упрощение: берем всех, сортировка целей лифта разрулит)
+            free = e.capacity - e.load
+            if queue and free > 0:
+                group = queue[:free]
+                del queue[:free]
+                for p in group:
                     p.state = "in_elevator"
                     p.enter_time = now
-                    e.passengers.append(p)
-                    if p.target:
-                        e.add_target(p.target)
+                    p.elevator_id = e.id
+                e.board(group)  # цели сливаются один раз на остановку
 
-                # Close doors and move (if targets exist)
-                # In a real sim, we'd wait a bit. Here assume instant close after logic for simplicity
-                # OR add a small delay logic variable.
-                e.close_doors()
+            # Close doors and move (if targets exist)
+            # In a real sim, we'd wait a bit. Here assume instant close after logic for simplicity
+            # OR add a small delay logic variable.
+            e.close_doors()
+        return stopped
 
     # Controls
     def start_sim(self):
@@ -212,27 +300,42 @@ class Simulation(threading.Thread):
         with self.lock:
             # Check condition: "Only if all elevators empty and stopped"
             for e in self.building.elevators:
-                if e.passengers or e.velocity != 0 or e.current_floor != int(e.current_floor):
+                if e.load or e.velocity != 0 or e.current_floor != int(e.current_floor):
                     return False
             self._stop_event.set()
             self._pause_event.set()  # Ensure thread wakes up to exit
             return True
 
-    def trigger_fire(self):
+    def trigger_fire(self, now: Optional[float] = None):
         with self.lock:
             if not self.fire_alarm:
                 self.fire_alarm = True
-                self.fire_start_time = time.time()
+                self.fire_start_time = now if now is not None else self.clock()
                 self.fire_alarms_count += 1
 
-    def stop_fire(self):
+    def stop_fire(self, now: Optional[float] = None):
         with self.lock:
             if self.fire_alarm:
                 self.fire_alarm = False
-                if self.fire_start_time:
-                    self.total_fire_duration += time.time() - self.fire_start_time
+                self._dispatch_pending = True
+                if self.fire_start_time is not None:
+                    self.total_fire_duration += (now if now is not None else self.clock()) - self.fire_start_time
                     self.fire_start_time = None
 
+    def get_step_stats(self):
+        """Статистика шагов: физика по всем лифтам и подшаги симуляции (по событиям)."""
+        per_car = [e.step_stats() for e in self.building.elevators]
+        steps = sum(s["steps"] for s in per_car)
+        substeps = sum(s["substeps"] for s in per_car)
+        return {
+            "steps": steps,
+            "substeps": substeps,
+            "substeps_per_step": substeps / steps if steps else 0.0,
+            "max_dt": max((s["max_dt"] for s in per_car), default=0.0),
+            "sim_steps": self.steps,
+            "sim_substeps": self.substeps,
+        }
+
     def get_stats(self):
         # Collect logic
         total_transported = sum(e.people_transported for e in self.building.elevators)
@@ -241,5 +344,6 @@ class Simulation(threading.Thread):
             "total_transported": total_transported,
             "fire_alarms": self.fire_alarms_count,
             "fire_duration": self.total_fire_duration,
-            "sim_time": self.sim_time_accumulator if hasattr(self, 'sim_time_accumulator') else 0
+            "sim_time": self.sim_time_accumulator,
+            "physics": self.get_step_stats()
         }
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""
+Локальный сервер состояния для внешних дашбордов (asyncio, TCP на localhost или Unix socket).
+
+Протокол - JSON по строкам.
+Сервер -> клиент: {"seq": 12, "key": false, "dropped": 0, "d": {"e1.floor": 3.25, "q4": 2}}
+    d - только изменившиеся поля относительно последнего кадра, отправленного ЭТОМУ клиенту
+    (key=true - полный кадр). Медленный клиент получает только самое свежее состояние,
+    промежуточные кадры выбрасываются (dropped), симуляция при этом не ждет.
+Клиент -> сервер: {"cmd": "spawn", "floor": 3}, ответ {"ack": "spawn", "ok": true}
+    Команды те же, что в UI: start, pause, stop, speed_up, slow_down, fire_start, fire_end,
+    fire, spawn, strategy, load_scenario. После успешного stop, как и в UI, создается
+    новая симуляция (start запускает ее с нуля).
+"""
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+from models import Building
+from controller import Controller, STRATEGIES
+from simulation import Simulation
+
+
+def snapshot(sim: Simulation) -> Dict[str, Any]:
+    """Плоский снимок состояния. Вызывать под sim.lock."""
+    b = sim.building
+    state: Dict[str, Any] = {
+        "t": round(sim.sim_time_accumulator, 2),
+        "speed": sim.speed_multiplier,
+        "fire": int(sim.fire_alarm),
+        "transported": sum(e.people_transported for e in b.elevators),
+    }
+    for e in b.elevators:
+        state[f"e{e.id}.floor"] = round(e.current_floor, 3)
+        state[f"e{e.id}.doors"] = int(e.doors_open)
+        state[f"e{e.id}.dir"] = e.direction
+        state[f"e{e.id}.load"] = e.load
+    for f, q in b.waiting_queues.items():
+        state[f"q{f}"] = len(q)
+    # Последние секундные значения метрик (см. timeseries.py)
+    if len(sim.metrics.times["1s"]):
+        for name in ("deliveries_per_min", "utilization", "queue.total"):
+            state[f"m.{name}"] = round(sim.metrics.latest(name), 3)
+    return state
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    d = {k: v for k, v in new.items() if old.get(k) != v or k not in old}
+    for k in old:
+        if k not in new:
+            d[k] = None
+    return d
+
+
+def apply_delta(state: Dict[str, Any], frame: Dict[str, Any]) -> Dict[str, Any]:
+    """Восстановление состояния на стороне клиента."""
+    if frame.get("key"):
+        state.clear()
+    for k, v in frame["d"].items():
+        if v is None:
+            state.pop(k, None)
+        else:
+            state[k] = v
+    return state
+
+
+class _Subscriber:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.last: Dict[str, Any] = {}
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+
+
+class StateServer:
+    def __init__(self, sim: Simulation, controller: Optional[Controller] = None, host: str = "127.0.0.1",
+                 port: int = 8765, unix_path: Optional[str] = None, interval: float = 0.1,
+                 write_buffer: int = 64 * 1024):
+        self.sim = sim
+        self.controller = controller if controller is not None else sim.controller
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.interval = interval
+        self.write_buffer = write_buffer
+
+        self.subscribers: Set[_Subscriber] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._latest: Dict[str, Any] = {}
+        self._seq = 0
+
+    # --- Lifecycle ---
+    async def start(self):
+        if self.unix_path:
+            self._server = await asyncio.start_unix_server(self._handle_client, path=self.unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]  # если port=0
+        self._ticker = asyncio.create_task(self._tick_loop())
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._ticker:
+            self._ticker.cancel()
+        for sub in list(self.subscribers):
+            sub.writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # --- Broadcasting ---
+    async def _tick_loop(self):
+        while True:
+            self.publish()
+            await asyncio.sleep(self.interval)
+
+    def publish(self):
+        # Не ждем блокировку: если симуляция сейчас в шаге, пропускаем кадр
+        if not self.sim.lock.acquire(blocking=False):
+            return
+        try:
+            self._latest = snapshot(self.sim)
+        finally:
+            self.sim.lock.release()
+        self._seq += 1
+        for sub in self.subscribers:
+            if sub.wakeup.is_set():
+                sub.dropped += 1  # предыдущий кадр так и не ушел
+            sub.wakeup.set()
+
+    async def _send_loop(self, sub: _Subscriber):
+        try:
+            while True:
+                await sub.wakeup.wait()
+                sub.wakeup.clear()
+                state = self._latest
+                frame = {"seq": self._seq, "key": not sub.last, "dropped": sub.dropped,
+                         "d": state if not sub.last else diff(sub.last, state)}
+                if not frame["d"] and not frame["key"]:
+                    continue
+                sub.last = state
+                sub.writer.write((json.dumps(frame, separators=(",", ":")) + "\n").encode())
+                await sub.writer.drain()  # ждет только этот клиент
+        except ConnectionError:
+            # Клиент ушел: закрываем соединение, чтобы _handle_client увидел EOF
+            sub.writer.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.transport.set_write_buffer_limits(high=self.write_buffer)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        sub = _Subscriber(writer)
+        self.subscribers.add(sub)
+        if self._latest:
+            sub.wakeup.set()
+        sender = asyncio.create_task(self._send_loop(sub))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = self.handle_command(line)
+                writer.write((json.dumps(reply) + "\n").encode())
+                # Клиент, который шлет команды и не читает ответы, упирается в буфер записи:
+                # следующую команду читаем, только когда ответ ушел
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            self.subscribers.discard(sub)
+            self._handlers.discard(handler)
+            writer.close()
+
+    # --- Commands ---
+    def handle_command(self, line: bytes) -> Dict[str, Any]:
+        try:
+            msg = json.loads(line)
+            cmd = msg["cmd"]
+        except (ValueError, KeyError, TypeError):
+            return {"ack": None, "ok": False, "error": "bad message"}
+        try:
+            ok = self._execute(cmd, msg)
+        except Exception as e:  # одна плохая команда не должна отключать клиента
+            return {"ack": cmd, "ok": False, "error": str(e) or type(e).__name__}
+        return {"ack": cmd, "ok": ok}
+
+    def _execute(self, cmd: str, msg: Dict[str, Any]) -> bool:
+        sim = self.sim
+        if cmd == "start":
+            sim.start_sim()
+        elif cmd == "pause":
+            sim.pause_sim()
+        elif cmd == "resume":
+            sim.resume_sim()
+        elif cmd == "stop":
+            if not sim.stop_sim():
+                return False
+            # Поток завершен и не может быть запущен снова: готовим новую симуляцию, как MainApp.stop_sim
+            b = sim.building
+            self.sim = Simulation(Building(b.num_floors, len(b.elevators)), self.controller, clock=sim.clock)
+            self.sim.speed_multiplier = sim.speed_multiplier
+        elif cmd == "speed_up":
+            sim.speed_multiplier *= 2.0
+        elif cmd == "slow_down":
+            sim.speed_multiplier /= 2.0
+        elif cmd == "fire":
+            if sim.fire_alarm:
+                sim.stop_fire()
+            else:
+                sim.trigger_fire()
+        elif cmd == "fire_start":
+            sim.trigger_fire()
+        elif cmd == "fire_end":
+            sim.stop_fire()
+        elif cmd == "spawn":
+            floor = int(msg.get("floor", 1))
+            if not 1 <= floor <= sim.building.num_floors:
+                raise ValueError(f"Floor must be 1-{sim.building.num_floors}")
+            with sim.lock:
+                sim.building.add_person(sim.building.new_person(floor, sim.clock()))
+        elif cmd == "strategy":
+            if msg["name"] not in STRATEGIES:
+                raise ValueError(f"Unknown strategy: {msg['name']}")
+            self.controller.set_strategy(msg["name"])
+        elif cmd == "load_scenario":
+            events = msg["events"]
+            if not isinstance(events, list):
+                raise ValueError("events must be a list")
+            with sim.lock:
+                sim.load_scenario(events)
+        else:
+            raise ValueError(f"Unknown command: {cmd}")
+        return True
@@ -0,0 +1,62 @@
+import os
+
+from journeys import JourneyArchive
+from models import Person
+
+
+def _person(i):
+    p = Person(origin=1 + i % 5, created_at=float(i))
+    p.id = i
+    p.target = 6 + i % 3
+    p.elevator_id = 1 + i % 2
+    p.decision_time = i + 3.0
+    p.enter_time = i + 4.5
+    p.delivered_at = i + 9.25
+    p.state = "evacuated" if i % 4 == 0 else "delivered"
+    return p
+
+
+def _fill(archive, n, start=0):
+    for i in range(start, start + n):
+        archive.record(_person(i))
+
+
+def test_buffers_grow_in_chunks():
+    archive = JourneyArchive(chunk_size=3)
+    _fill(archive, 7)
+    assert len(archive) == 7
+    assert archive._capacity == 9
+    assert list(archive.column("person_id")) == list(range(7))
+    assert list(archive.column("delivered_at")) == [i + 9.25 for i in range(7)]
+    assert list(archive.column("evacuated")) == [1 if i % 4 == 0 else 0 for i in range(7)]
+
+
+def test_spill_at_memory_cap_keeps_order_across_disk_and_memory(tmp_path):
+    archive = JourneyArchive(chunk_size=2, memory_cap=4, spill_dir=str(tmp_path))
+    _fill(archive, 10)
+    assert (archive.spilled, archive._size, len(archive)) == (8, 2, 10)
+    # Буферы переиспользуются, а не растут после сброса
+    assert archive._capacity == 4
+    assert os.path.getsize(tmp_path / "person_id.bin") == 8 * archive._buffers["person_id"].itemsize
+
+    assert list(archive.column("person_id")) == list(range(10))
+    assert list(archive.column("origin")) == [1 + i % 5 for i in range(10)]
+
+    batches = list(archive.iter_batches(batch_size=3))
+    assert [len(b) for b in batches] == [3, 3, 2, 2]  # диск пачками, затем память
+    rows = [row for b in batches for row in b]
+    assert [r[0] for r in rows] == list(range(10))
+    assert rows == [tuple(r.values()) for r in archive.rows()]
+
+
+def test_reused_spill_dir_is_truncated(tmp_path):
+    old = JourneyArchive(memory_cap=2, spill_dir=str(tmp_path))
+    _fill(old, 5)
+    assert old.spilled == 4
+
+    archive = JourneyArchive(memory_cap=2, spill_dir=str(tmp_path))
+    assert len(archive) == 0
+    assert list(archive.column("person_id")) == []
+    _fill(archive, 3, start=100)
+    assert list(archive.column("person_id")) == [100, 101, 102]
+    assert [row[0] for b in archive.iter_batches() for row in b] == [100, 101, 102]
@@ -0,0 +1,53 @@
+import pytest
+
+from models import Elevator, Person
+
+
+def _people(origin, targets):
+    people = []
+    for t in targets:
+        p = Person(origin, 0.0)
+        p.target = t
+        people.append(p)
+    return people
+
+
+def test_board_groups_mixed_destinations():
+    e = Elevator(1)
+    e.current_floor = 4.0
+    group = _people(4, [7, 2, 7, 5, 2, 7])
+    e.board(group)
+
+    assert e.load == 6
+    assert e.targets == [5, 2, 7]  # стоит: ближайшие первыми, без повторов
+    assert all(e.has_target(f) for f in (2, 5, 7)) and not e.has_target(4)
+    assert sorted(p.id for p in e.passengers) == sorted(p.id for p in group)
+
+
+def test_unload_removes_one_destination_group():
+    e = Elevator(1)
+    group = _people(1, [3, 6, 3, 6, 6])
+    e.board(group)
+
+    out = e.unload(6)
+    assert [p.target for p in out] == [6, 6, 6]
+    assert e.load == 2
+    assert e.unload(6) == [] and e.load == 2
+    # Цели снимает логика остановки
+    assert e.targets == [3, 6]
+    e.remove_target(6)
+    assert e.targets == [3] and not e.has_target(6)
+
+    rest = e.unload_all()
+    assert [p.target for p in rest] == [3, 3]
+    assert e.load == 0 and e.passengers == ()
+
+
+def test_passengers_is_read_only():
+    e = Elevator(1)
+    e.board(_people(1, [2]))
+    with pytest.raises(AttributeError):
+        e.passengers.append(Person(1, 0.0))
+    with pytest.raises(AttributeError):
+        e.passengers.remove(e.passengers[0])
+    assert e.load == 1
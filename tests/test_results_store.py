@@ -0,0 +1,105 @@
+import math
+import random
+
+import pytest
+
+from cli import run_headless
+from journeys import JourneyArchive
+from results_store import ResultsStore
+
+np = pytest.importorskip("numpy")
+
+CONFIG_A = {"num_floors": 8, "num_elevators": 2}
+CONFIG_B = {"num_floors": 12, "num_elevators": 3}
+
+
+def _run(tmp_path, name="run", seed=1, memory_cap=None):
+    rng = random.Random(seed)
+    events = [{"time": i * 2.0, "action": "spawn", "floor": rng.randint(1, 8), "count": 2} for i in range(20)]
+    archive = JourneyArchive(chunk_size=8, memory_cap=memory_cap, spill_dir=str(tmp_path / name)) \
+        if memory_cap else None
+    return run_headless(events, num_floors=8, num_elevators=2, seed=seed, archive=archive)
+
+
+def _save(store, sim, strategy="min_wait", config=CONFIG_A, seed=1, **kwargs):
+    return store.save_run(sim.get_stats(), strategy, config, seed=seed, **kwargs)
+
+
+def test_find_runs_and_query_filters(tmp_path):
+    sim = _run(tmp_path)
+    with ResultsStore(str(tmp_path / "results.db")) as store:
+        a = _save(store, sim, "min_wait", CONFIG_A, seed=1)
+        b = _save(store, sim, "min_idle", CONFIG_A, seed=2)
+        c = _save(store, sim, "min_wait", CONFIG_B, seed=None)
+
+        assert [r["id"] for r in store.find_runs()] == [a, b, c]
+        assert [r["id"] for r in store.find_runs(strategy="min_wait")] == [a, c]
+        assert [r["id"] for r in store.find_runs(config=dict(reversed(list(CONFIG_A.items()))))] == [a, b]
+        assert [r["id"] for r in store.find_runs(seed=2)] == [b]
+        assert [r["id"] for r in store.find_runs(strategy="min_wait", config=CONFIG_A, seed=1)] == [a]
+        assert store.find_runs(strategy="min_idle", seed=1) == []
+
+        res = store.query(("strategy", "config", "seed", "total_transported"))
+        assert res["id"].tolist() == [a, b, c]
+        assert res["strategy"].dtype == object and res["config"].dtype == object
+        assert res["strategy"].tolist() == ["min_wait", "min_idle", "min_wait"]
+        assert res["seed"][:2].tolist() == [1.0, 2.0] and math.isnan(res["seed"][2])
+        assert (res["total_transported"] == sim.get_stats()["total_transported"]).all()
+
+        assert store.query(("seed",), strategy="min_idle")["id"].tolist() == [b]
+        with pytest.raises(ValueError):
+            store.query(("no_such_field",))
+
+
+def test_elevator_stats_and_interval_metrics_round_trip(tmp_path):
+    sim = _run(tmp_path)
+    intervals = list(sim.metrics.export_intervals())
+    with ResultsStore(str(tmp_path / "results.db"), batch_size=7) as store:
+        run_id = _save(store, sim, intervals=intervals)
+
+        stats = store.elevator_stats(run_id)
+        elevators = sim.building.elevators
+        assert stats["elevator_id"].tolist() == [e.id for e in elevators]
+        assert stats["trips"].tolist() == [e.trips for e in elevators]
+        assert stats["empty_trips"].tolist() == [e.empty_trips for e in elevators]
+        assert stats["people_transported"].tolist() == [e.people_transported for e in elevators]
+
+        for name in ("queue.total", "utilization"):
+            expected = [(t, v) for t, n, v in intervals if n == name]
+            got = store.interval_metrics(run_id, name)
+            assert got["t"].tolist() == [t for t, _ in expected]
+            assert got["value"].tolist() == pytest.approx([v for _, v in expected])
+
+
+def test_journeys_match_spilled_archive(tmp_path):
+    sim = _run(tmp_path, memory_cap=7)  # 40 поездок: часть на диске, часть в памяти
+    assert sim.archive.spilled > 0 and len(sim.archive) > sim.archive.spilled
+
+    with ResultsStore(str(tmp_path / "results.db"), batch_size=3) as store:
+        run_id = _save(store, sim, journeys=sim.archive)
+        got = store.journeys(run_id)
+
+    expected = sim.archive.to_numpy()
+    for name in JourneyArchive.COLUMNS:
+        np.testing.assert_array_equal(got[name], expected[name].astype(float), err_msg=name)
+
+
+def test_two_writers_share_one_wal_file(tmp_path):
+    path = str(tmp_path / "results.db")
+    sim = _run(tmp_path)
+    first, second = ResultsStore(path), ResultsStore(path)
+    try:
+        assert first.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        ids = []
+        for seed in range(3):
+            ids.append(_save(first, sim, "min_wait", seed=seed, journeys=sim.archive))
+            ids.append(_save(second, sim, "min_idle", seed=seed, journeys=sim.archive))
+
+        assert len(set(ids)) == 6
+        for store in (first, second):
+            assert [r["id"] for r in store.find_runs()] == sorted(ids)
+            assert len(store.find_runs(strategy="min_idle")) == 3
+            assert len(store.journeys(ids[-1])["person_id"]) == len(sim.archive)
+    finally:
+        first.close()
+        second.close()
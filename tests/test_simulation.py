@@ -0,0 +1,108 @@
+import math
+import random
+
+import pytest
+
+from cli import ManualClock, run_headless
+from controller import Controller
+from models import Building
+from simulation import Simulation
+
+
+def _scenario():
+    rng = random.Random(7)
+    events = [{"time": i * 0.7, "action": "spawn", "floor": rng.randint(1, 12), "count": rng.randint(1, 3)}
+              for i in range(300)]
+    events += [{"time": 100.3, "action": "fire_start"}, {"time": 131.1, "action": "fire_end"}]
+    return events
+
+
+def _journeys(dt):
+    sim = run_headless(_scenario(), num_floors=12, num_elevators=3, seed=3, dt=dt)
+    rows = [tuple(None if math.isnan(v) else round(v, 6) for v in r.values()) for r in sim.archive.rows()]
+    return sim, rows
+
+
+def test_deliveries_do_not_depend_on_step_size():
+    fine, fine_rows = _journeys(0.05)
+    coarse, coarse_rows = _journeys(5.0)
+
+    assert fine.get_stats()["total_transported"] > 0
+    assert coarse.get_stats()["total_transported"] == fine.get_stats()["total_transported"]
+    # Те же люди, те же лифты, те же моменты входа и выхода
+    assert coarse_rows == fine_rows
+    assert coarse.get_step_stats()["sim_substeps"] > coarse.get_step_stats()["sim_steps"]
+
+
+def test_metrics_do_not_depend_on_step_size():
+    np = pytest.importorskip("numpy")
+    fine, _ = _journeys(0.05)
+    coarse, _ = _journeys(5.0)
+
+    for resolution in ("1s", "1m"):
+        a, b = fine.metrics.to_numpy(resolution), coarse.metrics.to_numpy(resolution)
+        # Грубый прогон может закончиться на шаг позже (прогон останавливается между шагами)
+        n = min(len(a["t"]), len(b["t"]))
+        assert n > 0 and abs(len(a["t"]) - len(b["t"])) <= 5
+        for name in a:
+            np.testing.assert_allclose(b[name][:n], a[name][:n], err_msg=f"{resolution} {name}")
+
+
+def test_recycled_person_starts_a_clean_life():
+    clock = ManualClock()
+    sim = Simulation(Building(3, 1), Controller(), clock=clock)
+    sim.load_scenario([{"time": 0, "action": "spawn", "floor": 1, "count": 1}])
+    while not len(sim.archive) or sim.building.people:
+        sim.step(1.0, clock.advance(1.0))
+    old = sim.archive.rows()[0]
+    p = sim.building._free_people[-1]
+
+    assert sim.building.new_person(2, clock()) is p
+    sim.building.add_person(p)
+    created = clock()
+    assert (p.state, p.origin, p.created_at, p.id) == ("choosing", 2, created, old["person_id"] + 1)
+    assert (p.target, p.decision_time, p.enter_time, p.delivered_at, p.elevator_id) == (None,) * 5
+
+    # Таймеры прошлой жизни (уже истекшие) не должны сработать для нового человека
+    sim._start_timer(p, old["created_at"])
+    sim._start_timer(p, old["delivered_at"])
+    sim.step(2.5, clock.advance(2.5))
+    assert p.state == "choosing" and p in sim.building.people
+
+    sim.step(1.0, clock.advance(1.0))
+    assert p.state in ("waiting", "in_elevator") and p.decision_time == pytest.approx(created + 3.0)
+
+
+def test_stop_unloads_boards_and_retargets():
+    clock = ManualClock(100.0)
+    sim = Simulation(Building(6, 1), Controller(), clock=clock)
+    e = sim.building.elevators[0]
+    riders = []
+    for target in (3, 5, 3):
+        p = sim.building.new_person(1, 90.0)
+        p.target, p.state = target, "in_elevator"
+        riders.append(p)
+    e.board(riders)
+    waiting = []
+    for target in (1, 6, 6):
+        p = sim.building.new_person(3, 95.0)
+        p.choose_target(6, 98.0)
+        p.target = target
+        waiting.append(p)
+    sim.building.waiting_queues[3].extend(waiting)
+    e.capacity = 3  # после высадки свободно два места
+    e.current_floor = 3.0
+    e.add_target(3)
+
+    assert sim._handle_normal_elevator_logic(clock()) is True
+    assert [p.state for p in riders] == ["delivered", "in_elevator", "delivered"]
+    assert all(riders[i].delivered_at == 100.0 for i in (0, 2))
+    assert [p.state for p in waiting] == ["in_elevator", "in_elevator", "waiting"]
+    assert all(p.enter_time == 100.0 and p.elevator_id == e.id for p in waiting[:2])
+    assert sim.building.waiting_queues[3] == waiting[2:]
+    assert e.load == 3 and e.people_transported == 2 and e.trips == 1
+    assert sorted(e.targets) == [1, 5, 6] and not e.has_target(3)
+    assert not e.doors_open
+    assert len(sim.archive) == 2
+    # Повторно у этажа 3 не останавливается: цели там больше нет
+    assert sim._handle_normal_elevator_logic(clock()) is False
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import socket
+
+from models import Building
+from controller import Controller
+from simulation import Simulation
+from state_server import StateServer, apply_delta
+
+
+async def _read_until(reader, pred, limit=200):
+    for _ in range(limit):
+        msg = json.loads(await asyncio.wait_for(reader.readline(), 5))
+        if pred(msg):
+            return msg
+    raise AssertionError("message not received")
+
+
+def _run(coro_fn, num_floors=10):
+    sim = Simulation(Building(num_floors, 2), Controller())
+    sim.speed_multiplier = 4.0
+    server = StateServer(sim, port=0, interval=0.005)
+
+    async def main():
+        await server.start()
+        try:
+            await coro_fn(server)
+        finally:
+            await server.close()
+            server.sim._stop_event.set()
+            server.sim._pause_event.set()
+
+    asyncio.run(main())
+
+
+def test_keyframe_then_deltas_rebuild_state():
+    async def scenario(server):
+        server.sim.start_sim()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        first = await _read_until(reader, lambda m: "seq" in m)
+        assert first["key"] is True
+        assert {"t", "e1.floor", "e2.load", "q10"} <= set(first["d"])
+
+        state = apply_delta({}, first)
+        delta = await _read_until(reader, lambda m: "seq" in m)
+        assert delta["key"] is False
+        assert set(delta["d"]) < set(state)  # only changed fields
+        apply_delta(state, delta)
+        assert state["t"] == delta["d"]["t"]
+
+        metrics = await _read_until(reader, lambda m: "m.utilization" in m.get("d", {}))
+        assert "m.deliveries_per_min" in apply_delta(state, metrics)
+        writer.close()
+
+    _run(scenario)
+
+
+def test_commands_are_acked_and_errors_keep_client_connected():
+    async def scenario(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        for line in (b'{"cmd": "start"}', b'{"cmd": "spawn", "floor": 99}', b'not json',
+                     b'{"cmd": "strategy", "name": "min_idle"}', b'{"cmd": "stop"}', b'{"cmd": "start"}',
+                     b'{"cmd": "spawn", "floor": 3}'):
+            writer.write(line + b"\n")
+        await writer.drain()
+
+        acks = []
+        while len(acks) < 7:
+            acks.append(await _read_until(reader, lambda m: "ack" in m))
+        assert [(a["ack"], a["ok"]) for a in acks] == [
+            ("start", True), ("spawn", False), (None, False), ("strategy", True),
+            ("stop", True), ("start", True), ("spawn", True)]
+        assert server.controller.strategy_name == "min_idle"
+        assert server.sim.is_alive()
+        assert len(server.sim.building.people) == 1
+        writer.close()
+
+    _run(scenario)
+
+
+def test_slow_client_drops_frames_without_blocking_sim():
+    async def scenario(server):
+        server.sim.start_sim()
+        # Маленький приемный буфер: клиент, который не читает, быстро забивает соединение
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+        sock.connect(("127.0.0.1", server.port))
+        sock.setblocking(False)
+        slow_reader, slow_writer = await asyncio.open_connection(sock=sock)
+        fast_reader, fast_writer = await asyncio.open_connection("127.0.0.1", server.port)
+        await asyncio.sleep(0.05)
+        slow = next(s for s in server.subscribers if s.writer.get_extra_info("peername") == sock.getsockname())
+        slow.writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1024)
+        slow.writer.transport.set_write_buffer_limits(high=256)
+
+        # Быстрый клиент читает, медленный - нет; раздуваем кадры спавном людей на всех этажах
+        t0 = server.sim.sim_time_accumulator
+        for _ in range(1000):
+            for f in range(1, server.sim.building.num_floors + 1):
+                server.handle_command(json.dumps({"cmd": "spawn", "floor": f}).encode())
+            msg = await _read_until(fast_reader, lambda m: "seq" in m)
+            if slow.dropped > 5:
+                break
+        assert slow.dropped > 5
+        assert msg["dropped"] == 0
+        assert server.sim.sim_time_accumulator > t0  # sim kept stepping
+        slow_writer.close()
+        fast_writer.close()
+
+    _run(scenario, num_floors=300)
+
+
+def test_pipelined_commands_do_not_grow_the_write_buffer():
+    async def scenario(server):
+        handled = []
+        handle_command = server.handle_command
+        server.handle_command = lambda line: handled.append(line) or handle_command(line)
+
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+        sock.connect(("127.0.0.1", server.port))
+        sock.setblocking(False)
+        reader, writer = await asyncio.open_connection(sock=sock)
+        await asyncio.sleep(0.05)
+        sub = next(s for s in server.subscribers if s.writer.get_extra_info("peername") == sock.getsockname())
+        sub.writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1024)
+        sub.writer.transport.set_write_buffer_limits(high=256)
+
+        # Шлем много команд и не читаем ответы
+        count = 20000
+        writer.write(b'{"cmd": "resume"}\n' * count)
+        await asyncio.sleep(0.5)
+        buffered, handled_while_blocked = sub.writer.transport.get_write_buffer_size(), len(handled)
+
+        # Клиент начал читать: все команды обработаны и подтверждены
+        acks = 0
+        while acks < count:
+            if "ack" in json.loads(await asyncio.wait_for(reader.readline(), 5)):
+                acks += 1
+        assert len(handled) == count
+        assert buffered < 4096
+        assert handled_while_blocked < count  # сервер перестал читать команды, а не копил ответы
+        writer.close()
+
+    _run(scenario)
@@ -0,0 +1,86 @@
+import math
+
+from models import Building
+from timeseries import RingBuffer, TimeSeriesRecorder
+
+
+class _SmallRecorder(TimeSeriesRecorder):
+    # Маленькие кольца, чтобы быстро дойти до перезаписи и 15-минутных точек
+    CAPACITY = {"1s": 10, "1m": 3, "15m": 4}
+
+
+def _feed(rec, building, seconds):
+    """Секунда t (1..seconds): в очереди 1-го этажа (t - 1) // 60 человек - номер минуты с нуля."""
+    for t in range(1, seconds + 1):
+        building.waiting_queues[1][:] = [None] * ((t - 1) // 60)
+        rec.sample(float(t))
+
+
+def test_ring_buffer_wraps_around():
+    buf = RingBuffer(4)
+    assert len(buf) == 0 and math.isnan(buf.latest())
+
+    for v in range(1, 5):
+        buf.append(v)
+    assert buf.head == 0  # записали ровно capacity значений
+    assert buf.latest() == 4
+    assert list(buf.last(4)) == [1, 2, 3, 4]
+
+    buf.append(5)
+    buf.append(6)
+    assert len(buf) == 4 and buf.head == 2
+    assert list(buf.last(4)) == [3, 4, 5, 6]  # через шов
+    assert list(buf.last(3)) == [4, 5, 6]
+    assert list(buf.last(2)) == [5, 6]
+    assert list(buf.last(10)) == [3, 4, 5, 6]
+    assert buf.latest() == 6
+
+
+def test_sample_writes_one_point_per_crossed_second():
+    b = Building(2, 1)
+    rec = TimeSeriesRecorder(b)
+    rec.sample(0.5)
+    assert len(rec.times["1s"]) == 0
+    b.waiting_queues[2][:] = [None, None]
+    rec.sample(3.5)  # пройдены границы 1, 2, 3
+    assert list(rec.times["1s"].last(10)) == [1.0, 2.0, 3.0]
+    assert list(rec.series["1s"]["queue.2"].last(10)) == [2.0, 2.0, 2.0]
+    assert rec.latest("queue.total") == 2.0
+    assert rec.next_sample_time() == 4.0
+
+
+def test_minute_and_quarter_hour_means():
+    b = Building(2, 1)
+    rec = _SmallRecorder(b)
+    _feed(rec, b, 1800)
+
+    # 1s: только последние 10 отсчетов
+    assert list(rec.times["1s"].last(100)) == [float(t) for t in range(1791, 1801)]
+    # 1m: средние по минутам, в кольце последние 3
+    assert list(rec.times["1m"].last(100)) == [1680.0, 1740.0, 1800.0]
+    assert list(rec.series["1m"]["queue.1"].last(100)) == [27.0, 28.0, 29.0]
+    # 15m: среднее номеров минут 0..14 и 15..29
+    assert list(rec.times["15m"].last(100)) == [900.0, 1800.0]
+    assert list(rec.series["15m"]["queue.1"].last(100)) == [7.0, 22.0]
+    assert rec.mean("queue.1", 120, "1m") == 28.5
+    assert rec.series["1m"]["utilization"].latest() == 0.0
+
+
+def test_export_uses_quarter_hours_only_before_the_minute_ring():
+    b = Building(2, 1)
+    rec = _SmallRecorder(b)
+    _feed(rec, b, 1800)
+
+    points = [(t, v) for t, name, v in rec.export_intervals() if name == "queue.1"]
+    # 15m-точка 1800 перекрыта минутными, 900 - старше минутного кольца
+    assert points == [(900.0, 7.0), (1680.0, 27.0), (1740.0, 28.0), (1800.0, 29.0)]
+    names = {name for _, name, _ in rec.export_intervals()}
+    assert names == set(rec.names)
+
+
+def test_export_without_quarter_hours_is_the_minute_series():
+    b = Building(2, 1)
+    rec = TimeSeriesRecorder(b)
+    _feed(rec, b, 180)
+    points = [(t, v) for t, name, v in rec.export_intervals() if name == "queue.1"]
+    assert points == [(60.0, 0.0), (120.0, 1.0), (180.0, 2.0)]
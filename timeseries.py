@@ -0,0 +1,178 @@
+import math
+from array import array
+from typing import Dict, Iterator, List, Tuple
+from models import Building
+
+SAMPLE_EPS = 1e-9  # с
+
+
+class RingBuffer:
+    """Кольцевой буфер фиксированного размера (float64)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.values = array('d', bytes(8 * capacity))
+        self.head = 0  # куда писать следующее значение
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value: float):
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self, n: int) -> array:
+        """Последние n значений (от старых к новым). O(n)."""
+        n = min(n, self.count)
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.values[start:start + n]
+        return self.values[start:] + self.values[:self.head]
+
+    def latest(self) -> float:
+        return self.values[self.head - 1] if self.count else math.nan
+
+
+class TimeSeriesRecorder:
+    """
+    Метрики во времени с несколькими разрешениями.
+    Раз в секунду симуляции снимаются мгновенные значения (разрешение 1s);
+    разрешения 1m и 15m хранят средние по соответствующим интервалам.
+
+    Метрики:
+        queue.<floor>, queue.total - длина очереди
+        util.<eid>, utilization - занят ли лифт (едет, открыт или есть цели)
+        load.<eid> - загрузка кабины (доля вместимости)
+        deliveries_per_min - доставлено людей в минуту
+    """
+
+    RESOLUTIONS = {"1s": 1.0, "1m": 60.0, "15m": 900.0}
+    # 1 час / 1 сутки / 1 неделя
+    CAPACITY = {"1s": 3600, "1m": 1440, "15m": 672}
+
+    def __init__(self, building: Building):
+        self.building = building
+        self.names: List[str] = [f"queue.{f}" for f in building.waiting_queues] + ["queue.total"]
+        for e in building.elevators:
+            self.names += [f"util.{e.id}", f"load.{e.id}"]
+        self.names += ["utilization", "deliveries_per_min"]
+
+        self.times: Dict[str, RingBuffer] = {r: RingBuffer(self.CAPACITY[r]) for r in self.RESOLUTIONS}
+        self.series: Dict[str, Dict[str, RingBuffer]] = {
+            r: {name: RingBuffer(self.CAPACITY[r]) for name in self.names} for r in self.RESOLUTIONS}
+
+        # Накопители для грубых разрешений: сумма значений и число секундных отсчетов
+        self._sums: Dict[str, Dict[str, float]] = {r: dict.fromkeys(self.names, 0.0) for r in self.RESOLUTIONS}
+        self._counts: Dict[str, int] = dict.fromkeys(self.RESOLUTIONS, 0)
+
+        self._next_sample = 1.0
+        self._last_transported = 0
+
+    def next_sample_time(self) -> float:
+        """Секунда симуляции, на которой будет следующий отсчет (Simulation делит шаг на этой границе)."""
+        return self._next_sample
+
+    def sample(self, sim_time: float):
+        """Вызывается на каждом шаге симуляции; пишет по отсчету за каждую прошедшую секунду."""
+        # Допуск: шаг, разделенный ровно на границе, может не дотянуть до нее на погрешность сложения
+        if sim_time < self._next_sample - SAMPLE_EPS:
+            return
+        k = int(sim_time - self._next_sample + SAMPLE_EPS) + 1  # сколько секундных границ пройдено
+
+        transported = sum(e.people_transported for e in self.building.elevators)
+        rate = (transported - self._last_transported) * 60.0 / k
+        self._last_transported = transported
+        values = self._current_values(rate)
+
+        for _ in range(k):
+            self._push(self._next_sample, values)
+            self._next_sample += 1.0
+
+    def _current_values(self, rate: float) -> Dict[str, float]:
+        b = self.building
+        values: Dict[str, float] = {}
+        total = 0
+        for f, q in b.waiting_queues.items():
+            values[f"queue.{f}"] = len(q)
+            total += len(q)
+        values["queue.total"] = total
+
+        busy = 0
+        for e in b.elevators:
+            is_busy = 1.0 if (e.velocity != 0 or e.doors_open or e.targets or e.load) else 0.0
+            busy += is_busy
+            values[f"util.{e.id}"] = is_busy
+            values[f"load.{e.id}"] = e.load / e.capacity
+        values["utilization"] = busy / len(b.elevators) if b.elevators else 0.0
+        values["deliveries_per_min"] = rate
+        return values
+
+    def _push(self, t: float, values: Dict[str, float]):
+        self.times["1s"].append(t)
+        for name, buf in self.series["1s"].items():
+            buf.append(values[name])
+
+        for res, step in self.RESOLUTIONS.items():
+            if res == "1s":
+                continue
+            sums = self._sums[res]
+            for name in self.names:
+                sums[name] += values[name]
+            self._counts[res] += 1
+            if self._counts[res] >= step:
+                n = self._counts[res]
+                self.times[res].append(t)
+                for name, buf in self.series[res].items():
+                    buf.append(sums[name] / n)
+                    sums[name] = 0.0
+                self._counts[res] = 0
+
+    # --- Queries ---
+    def window(self, name: str, seconds: float, resolution: str = "1s") -> Tuple[array, array]:
+        """(время конца интервала, значение) за последние seconds секунд. O(окна)."""
+        n = int(math.ceil(seconds / self.RESOLUTIONS[resolution]))
+        return self.times[resolution].last(n), self.series[resolution][name].last(n)
+
+    def mean(self, name: str, seconds: float, resolution: str = "1s") -> float:
+        _, values = self.window(name, seconds, resolution)
+        return sum(values) / len(values) if values else math.nan
+
+    def latest(self, name: str, resolution: str = "1s") -> float:
+        return self.series[resolution][name].latest()
+
+    def to_numpy(self, resolution: str = "1s") -> Dict[str, "numpy.ndarray"]:
+        import numpy as np  # Опциональная зависимость
+
+        n = len(self.times[resolution])
+        out = {"t": np.array(self.times[resolution].last(n))}
+        for name, buf in self.series[resolution].items():
+            out[name] = np.array(buf.last(n))
+        return out
+
+    def intervals(self, resolution: str = "1m") -> Iterator[Tuple[float, str, float]]:
+        """Все сохраненные точки как (t, name, value) - формат ResultsStore.save_run(intervals=...)."""
+        n = len(self.times[resolution])
+        times = self.times[resolution].last(n)
+        for name, buf in self.series[resolution].items():
+            for t, v in zip(times, buf.last(n)):
+                yield t, name, v
+
+    def export_intervals(self) -> Iterator[Tuple[float, str, float]]:
+        """
+        Точки для сохранения прогона: минутные, а для времени старше минутного кольца
+        (прогоны длиннее суток) - 15-минутные средние. Точки каждой метрики идут по времени;
+        шаг t показывает разрешение.
+        """
+        n = len(self.times["1m"])
+        oldest = self.times["1m"].last(n)[0] if n else math.inf
+        n15 = len(self.times["15m"])
+        times15 = self.times["15m"].last(n15)
+        for name in self.names:
+            for t, v in zip(times15, self.series["15m"][name].last(n15)):
+                if t <= oldest - self.RESOLUTIONS["1m"]:
+                    yield t, name, v
+            for t, v in zip(self.times["1m"].last(n), self.series["1m"][name].last(n)):
+                yield t, name, v